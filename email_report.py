@@ -10,17 +10,15 @@ NAPRAWY W TEJ WERSJI:
   ✓ Obsługa braku danych bez wyrzucania wyjątków
 """
 
-import smtplib
 import json
 import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import html as html_mod
 from datetime import datetime, timedelta
 from collections import defaultdict
-import openpyxl
-import requests
+
+# openpyxl, requests oraz smtplib/email.mime są importowane leniwie w
+# funkcjach, które ich używają — skraca zimny start skryptu na runnerze
+# Actions, zwłaszcza na ścieżkach wczesnego wyjścia (brak danych/hasła)
 
 # ─── KONFIGURACJA ────────────────────────────────────────────────────────────
 
@@ -28,8 +26,53 @@ SENDER_EMAIL    = "slowholidays00@gmail.com"
 RECIPIENT_EMAIL = "malczarski@gmail.com"
 EXCEL_FILE      = "data/olx_monitoring.xlsx"
 
+# Bezpiecznik: plik monitoringu rośnie o ~30 wierszy dziennie, więc
+# większy rozmiar oznacza uszkodzenie/rozdęcie — nie parsuj go na runnerze
+MAX_EXCEL_BYTES = 100_000_000
+
+# Jedna sesja HTTP dla wywołań Gemini — keep-alive oszczędza
+# handshake TLS przy retry na kolejny model; adapter dokłada
+# automatyczny retry na przejściowe 5xx
+_SESSION = None
+
+def _get_session():
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        _SESSION = requests.Session()
+        _SESSION.mount("https://", requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=1,
+            max_retries=requests.adapters.Retry(
+                total=2, backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=["POST"],
+            ),
+        ))
+    return _SESSION
+
 # ─── ZBIERANIE DANYCH Z EXCELA ───────────────────────────────────────────────
 
+def _parse_scan_dt(value, _cache={}) -> datetime | None:
+    """
+    Parsuje datę skanu z kolumny A ("YYYY-MM-DD HH:MM:SS") z memoizacją.
+    Wiersze z jednego skanu mają identyczny timestamp, więc strptime
+    wykonuje się raz na skan zamiast raz na wiersz.
+    """
+    key = str(value)
+    dt  = _cache.get(key)
+    if dt is None:
+        try:
+            # Format kolumny jest zgodny z ISO — fromisoformat jest w C
+            # i kilkukrotnie szybszy od strptime
+            dt = _cache[key] = datetime.fromisoformat(key[:19])
+        except Exception:
+            try:
+                dt = _cache[key] = datetime.strptime(key[:16], "%Y-%m-%d %H:%M")
+            except Exception:
+                return None
+    return dt
+
+
 def get_weekly_data() -> dict:
     """
     Odczytuje dane z ostatnich 7 dni z arkusza 'Historia' w Excelu.
@@ -50,57 +93,87 @@ def get_weekly_data() -> dict:
       }
     }
     """
+    import openpyxl
+
     if not os.path.exists(EXCEL_FILE):
         print(f"⚠  Brak pliku Excel: {EXCEL_FILE}")
         return {}
 
+    size = os.path.getsize(EXCEL_FILE)
+    if size > MAX_EXCEL_BYTES:
+        print(f"⚠  Plik Excel podejrzanie duży ({size/1e6:.0f} MB) – pomijam raport")
+        return {}
+
     try:
-        wb = openpyxl.load_workbook(EXCEL_FILE, data_only=True)
+        # read_only = streaming parser zamiast pełnego DOM — przy dużym
+        # pliku monitoringu oszczędza wielokrotność rozmiaru pliku w RAM
+        wb = openpyxl.load_workbook(EXCEL_FILE, read_only=True,
+                                    data_only=True, keep_links=False)
     except Exception as e:
         print(f"⚠  Błąd otwarcia Excela: {e}")
         return {}
 
-    # Sprawdź czy istnieje arkusz "Historia"
-    if "Historia" not in wb.sheetnames:
-        print(f"⚠  Brak arkusza 'Historia' w Excelu. Dostępne: {wb.sheetnames}")
-        return {}
-
-    ws       = wb["Historia"]
-    week_ago = datetime.now() - timedelta(days=7)
-    data     = defaultdict(lambda: {})
-
-    print(f"  Czytanie arkusza: Historia ({ws.max_row - 1} wierszy)")
-
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-        if not row[0]:  # pusta linia
-            continue
-
-        try:
-            # Kolumna A: Data skanu (YYYY-MM-DD HH:MM:SS)
-            row_dt = datetime.strptime(str(row[0])[:16], "%Y-%m-%d %H:%M")
-        except Exception:
-            continue
-
-        if row_dt < week_ago:
-            continue
-
-        profile = str(row[1]).strip() if row[1] else "unknown"
-        date_str = row_dt.strftime("%Y-%m-%d")
-
-        # Dla każdego profilu/dnia — zachowaj timestamp ostatniego skanu
-        if date_str not in data[profile]:
-            data[profile][date_str] = {
-                "timestamp": row_dt,
-                "count": 1,
-            }
-        else:
-            # Jeśli ten sam profil skanowano wiele razy w dzień
-            # — zachowaj liczę z ostatniego skanowania
-            if row_dt > data[profile][date_str]["timestamp"]:
-                data[profile][date_str]["timestamp"] = row_dt
-                data[profile][date_str]["count"] += 1
+    try:
+        # Sprawdź czy istnieje arkusz "Historia"
+        if "Historia" not in wb.sheetnames:
+            print(f"⚠  Brak arkusza 'Historia' w Excelu. Dostępne: {wb.sheetnames}")
+            return {}
+
+        ws       = wb["Historia"]
+        week_ago = datetime.now() - timedelta(days=7)
+        # Format "YYYY-MM-DD HH:MM:SS" sortuje się leksykograficznie,
+        # więc stare wiersze można odrzucić porównaniem stringów
+        # bez parsowania daty
+        cutoff_str = week_ago.strftime("%Y-%m-%d %H:%M:%S")
+        # Płaska agregacja po kluczu (profil, dzień) — jedno wyszukiwanie
+        # na wiersz zamiast dwóch zagnieżdżonych słowników
+        agg: dict = {}
+
+        print("  Czytanie arkusza: Historia")
+
+        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+            if not row[0]:  # pusta linia
+                continue
 
-    return dict(data)
+            # Kolumna A: Data skanu (YYYY-MM-DD HH:MM:SS).
+            # openpyxl potrafi zwrócić gotowy datetime dla komórek
+            # sformatowanych jako data — wtedy parsowanie jest zbędne.
+            if isinstance(row[0], datetime):
+                row_dt = row[0]
+                if row_dt < week_ago:
+                    continue
+            else:
+                if str(row[0])[:19] < cutoff_str:
+                    continue  # wiersz starszy niż tydzień — bez parsowania
+                row_dt = _parse_scan_dt(row[0])
+                if row_dt is None:
+                    continue
+
+            profile = str(row[1]).strip() if row[1] else "unknown"
+            date_str = row_dt.strftime("%Y-%m-%d")
+
+            # Dla każdego profilu/dnia — licz wiersze OSTATNIEGO skanu.
+            # Wiersze jednego skanu mają identyczny timestamp, więc:
+            # nowszy timestamp resetuje licznik, ten sam go zwiększa,
+            # starszy (wcześniejszy skan tego dnia) jest ignorowany.
+            key   = (profile, date_str)
+            entry = agg.get(key)
+            if entry is None or row_dt > entry["timestamp"]:
+                agg[key] = {
+                    "timestamp": row_dt,
+                    "count": 1,
+                }
+            elif row_dt == entry["timestamp"]:
+                entry["count"] += 1
+
+        # Na granicy funkcji odtwórz kształt {profil: {dzień: ...}}
+        # oczekiwany przez compute_summary
+        data = defaultdict(dict)
+        for (profile, date_str), entry in agg.items():
+            data[profile][date_str] = entry
+        return dict(data)
+    finally:
+        wb.close()  # zwolnij uchwyt zipfile od razu, nie przy GC
 
 
 def compute_summary(raw_data: dict) -> dict:
@@ -116,14 +189,16 @@ def compute_summary(raw_data: dict) -> dict:
         if not dates:
             continue
 
-        rows = []
-        for i, date_str in enumerate(dates):
-            entry = daily_dict[date_str]
-            total = entry["count"]
-            
+        # Jeden przebieg: wiersze dzienne + sumy tygodniowe naraz
+        rows          = []
+        total_new     = 0
+        total_deleted = 0
+        prev_total    = None
+        for date_str in dates:
+            total = daily_dict[date_str]["count"]
+
             # Oblicz změny względem poprzedniego dnia
-            if i > 0:
-                prev_total = daily_dict[dates[i-1]]["count"]
+            if prev_total is not None:
                 delta = total - prev_total
                 new_count = max(0, delta)      # nowe = jeśli wzrost
                 deleted_count = max(0, -delta)  # usunięte = jeśli spadek
@@ -132,7 +207,10 @@ def compute_summary(raw_data: dict) -> dict:
                 new_count = 0
                 deleted_count = 0
                 net = 0
-            
+            prev_total     = total
+            total_new     += new_count
+            total_deleted += deleted_count
+
             rows.append({
                 "date": date_str,
                 "total": total,
@@ -141,9 +219,7 @@ def compute_summary(raw_data: dict) -> dict:
                 "net": net,
             })
 
-        total_new = sum(r["new"] for r in rows)
-        total_deleted = sum(r["deleted"] for r in rows)
-        
+
         summary[profile] = {
             "days_tracked":  len(rows),
             "total_new":     total_new,
@@ -160,71 +236,20 @@ def compute_summary(raw_data: dict) -> dict:
 
 # ─── HTML E-MAIL ─────────────────────────────────────────────────────────────
 
-def build_html_email(summary: dict, weekly_data: dict, analysis: str) -> str:
-    today      = datetime.now().strftime("%d.%m.%Y")
-    week_start = (datetime.now() - timedelta(days=6)).strftime("%d.%m.%Y")
+# Wspólne fragmenty stylów komórek — jeden string zamiast
+# re-materializacji tego samego literału w każdej iteracji
+_TD_SUM = "padding:10px 14px;border-bottom:1px solid #eee;"
+_TD_DAY = "padding:8px 12px;border-bottom:1px solid #eee;"
 
-    summary_rows = ""
-    for profile, s in summary.items():
-        trend = "↑" if s["net_week"] > 0 else ("↓" if s["net_week"] < 0 else "→")
-        new_style = "color:#1a7a3c;font-weight:bold;" if s["total_new"] > 0 else ""
-        del_style = "color:#c0392b;font-weight:bold;" if s["total_deleted"] > 0 else ""
-        net_color = "#1a7a3c" if s["net_week"] > 0 else ("#c0392b" if s["net_week"] < 0 else "#555")
-        err_style = "color:#c0392b;font-weight:bold;" if s["errors"] > 0 else "color:#888;"
-        net_str   = f"{s['net_week']:+d}{trend}"
-
-        summary_rows += f"""
-        <tr>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;font-weight:600;">{profile}</td>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;text-align:center;">{s['days_tracked']}</td>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;text-align:center;font-weight:600;">{s['last_count']}</td>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;text-align:center;{new_style}">{s['total_new']:+d}</td>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;text-align:center;{del_style}">{s['total_deleted']}</td>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;text-align:center;color:{net_color};font-weight:bold;">{net_str}</td>
-          <td style="padding:10px 14px;border-bottom:1px solid #eee;text-align:center;{err_style}">{s['errors']}</td>
-        </tr>"""
-
-    daily_sections = ""
-    for profile, rows in summary.items():
-        if not rows["rows"]:
-            continue
-            
-        daily_rows = ""
-        for i, r in enumerate(rows["rows"]):
-            bg      = "#f9f9f9" if i % 2 == 0 else "#ffffff"
-            net_str = f"{r.get('net', 0):+d}" if r.get('net', 0) != 0 else "—"
-            net_col = "#1a7a3c" if r.get('net', 0) > 0 else ("#c0392b" if r.get('net', 0) < 0 else "#888")
-            new_col = "#1a7a3c" if r.get('new', 0) > 0 else "#333"
-            del_col = "#c0392b" if r.get('deleted', 0) > 0 else "#333"
-            daily_rows += f"""
-            <tr style="background:{bg};">
-              <td style="padding:8px 12px;border-bottom:1px solid #eee;">{r['date']}</td>
-              <td style="padding:8px 12px;border-bottom:1px solid #eee;text-align:center;font-weight:600;">{r['total']}</td>
-              <td style="padding:8px 12px;border-bottom:1px solid #eee;text-align:center;color:{new_col};font-weight:{'bold' if r.get('new',0)>0 else 'normal'};">{r.get('new', 0):+d}</td>
-              <td style="padding:8px 12px;border-bottom:1px solid #eee;text-align:center;color:{del_col};">{r.get('deleted', 0)}</td>
-              <td style="padding:8px 12px;border-bottom:1px solid #eee;text-align:center;color:{net_col};font-weight:bold;">{net_str}</td>
-            </tr>"""
-
-        daily_sections += f"""
-        <div style="margin-bottom:24px;">
-          <h3 style="margin:0 0 8px 0;font-size:13px;text-transform:uppercase;
-                     letter-spacing:1px;color:#2c5f8a;">{profile}</h3>
-          <table width="100%" cellpadding="0" cellspacing="0"
-                 style="border-collapse:collapse;font-size:13px;">
-            <thead>
-              <tr style="background:#2c5f8a;color:#fff;">
-                <th style="padding:8px 12px;text-align:left;">Data</th>
-                <th style="padding:8px 12px;text-align:center;">Ogłoszeń</th>
-                <th style="padding:8px 12px;text-align:center;">Nowe</th>
-                <th style="padding:8px 12px;text-align:center;">Usunięte</th>
-                <th style="padding:8px 12px;text-align:center;">Netto</th>
-              </tr>
-            </thead>
-            <tbody>{daily_rows}</tbody>
-          </table>
-        </div>"""
+# Kolory/strzałki wg znaku zmiany netto — jedno wyszukiwanie w tabeli
+# zamiast kaskady ternary w każdym wierszu
+_GREEN, _RED = "#1a7a3c", "#c0392b"
+_NET_SUM = {1: (_GREEN, "↑"), -1: (_RED, "↓"), 0: ("#555", "→")}
+_NET_DAY = {1: _GREEN, -1: _RED, 0: "#888"}
 
-    return f"""<!DOCTYPE html>
+# Statyczny szkielet e-maila zbudowany raz na poziomie modułu —
+# build_html_email wstawia tylko dynamiczne fragmenty przez .format()
+_HTML_SHELL = """<!DOCTYPE html>
 <html lang="pl">
 <head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1"></head>
 <body style="margin:0;padding:0;background:#f0f4f8;font-family:Arial,sans-serif;">
@@ -271,7 +296,7 @@ def build_html_email(summary: dict, weekly_data: dict, analysis: str) -> str:
     <div style="background:#f0f4f8;border-left:4px solid #2c5f8a;padding:16px 20px;
                 border-radius:0 6px 6px 0;margin-bottom:28px;font-size:14px;
                 line-height:1.7;color:#333;">
-      {analysis.replace(chr(10), '<br>')}
+      {analysis_html}
     </div>
 
     <h2 style="margin:0 0 16px;font-size:15px;color:#2c5f8a;text-transform:uppercase;
@@ -285,16 +310,133 @@ def build_html_email(summary: dict, weekly_data: dict, analysis: str) -> str:
   <div style="background:#f0f4f8;padding:16px 32px;text-align:center;
               font-size:11px;color:#888;border-top:1px solid #e0e8f0;">
     Raport wygenerowany automatycznie przez OLX Monitor &nbsp;·&nbsp;
-    GitHub Actions &nbsp;·&nbsp; {datetime.now().strftime("%Y-%m-%d %H:%M")}
+    GitHub Actions &nbsp;·&nbsp; {generated}
   </div>
 
 </div>
 </body>
 </html>"""
 
+def build_html_email(summary: dict, weekly_data: dict, analysis: str) -> str:
+    now        = datetime.now()
+    today      = now.strftime("%d.%m.%Y")
+    week_start = (now - timedelta(days=6)).strftime("%d.%m.%Y")
+    generated  = now.strftime("%Y-%m-%d %H:%M")
+
+    # Tekst z Gemini escapuj raz i od razu zamień nowe linie na <br> —
+    # model może zwrócić znaki specjalne HTML
+    analysis_html = html_mod.escape(analysis).replace("\n", "<br>")
+
+    # Wiersze zbieramy w listach i sklejamy raz — str += w pętli
+    # kopiuje cały dotychczasowy bufor przy każdej iteracji
+    summary_parts       = []
+    daily_section_parts = []
+    for profile, s in summary.items():
+        # Każda wartość czytana raz do lokalnej zmiennej zamiast
+        # wielokrotnego hashowania tego samego klucza
+        net_week  = s["net_week"]
+        total_new = s["total_new"]
+        total_del = s["total_deleted"]
+        errors    = s["errors"]
+        net_color, trend = _NET_SUM[(net_week > 0) - (net_week < 0)]
+        new_style = f"color:{_GREEN};font-weight:bold;" if total_new > 0 else ""
+        del_style = f"color:{_RED};font-weight:bold;" if total_del > 0 else ""
+        err_style = f"color:{_RED};font-weight:bold;" if errors > 0 else "color:#888;"
+        net_str   = f"{net_week:+d}{trend}"
+
+        summary_parts.append(f"""
+        <tr>
+          <td style="{_TD_SUM}font-weight:600;">{profile}</td>
+          <td style="{_TD_SUM}text-align:center;">{s['days_tracked']}</td>
+          <td style="{_TD_SUM}text-align:center;font-weight:600;">{s['last_count']}</td>
+          <td style="{_TD_SUM}text-align:center;{new_style}">{total_new:+d}</td>
+          <td style="{_TD_SUM}text-align:center;{del_style}">{total_del}</td>
+          <td style="{_TD_SUM}text-align:center;color:{net_color};font-weight:bold;">{net_str}</td>
+          <td style="{_TD_SUM}text-align:center;{err_style}">{errors}</td>
+        </tr>""")
+
+        # Sekcja dzienna tego samego profilu w tym samym przebiegu —
+        # jedna iteracja po summary zamiast dwóch
+        if not s["rows"]:
+            continue
+
+        daily_row_parts = []
+        for i, r in enumerate(s["rows"]):
+            # compute_summary gwarantuje wszystkie klucze — bez .get z defaultem
+            net     = r["net"]
+            new     = r["new"]
+            deleted = r["deleted"]
+            bg      = "#f9f9f9" if i % 2 == 0 else "#ffffff"
+            net_str = f"{net:+d}" if net != 0 else "—"
+            net_col = _NET_DAY[(net > 0) - (net < 0)]
+            new_col = _GREEN if new > 0 else "#333"
+            del_col = _RED if deleted > 0 else "#333"
+            daily_row_parts.append(f"""
+            <tr style="background:{bg};">
+              <td style="{_TD_DAY}">{r['date']}</td>
+              <td style="{_TD_DAY}text-align:center;font-weight:600;">{r['total']}</td>
+              <td style="{_TD_DAY}text-align:center;color:{new_col};font-weight:{'bold' if new > 0 else 'normal'};">{new:+d}</td>
+              <td style="{_TD_DAY}text-align:center;color:{del_col};">{deleted}</td>
+              <td style="{_TD_DAY}text-align:center;color:{net_col};font-weight:bold;">{net_str}</td>
+            </tr>""")
+        daily_rows = "".join(daily_row_parts)
+
+        daily_section_parts.append(f"""
+        <div style="margin-bottom:24px;">
+          <h3 style="margin:0 0 8px 0;font-size:13px;text-transform:uppercase;
+                     letter-spacing:1px;color:#2c5f8a;">{profile}</h3>
+          <table width="100%" cellpadding="0" cellspacing="0"
+                 style="border-collapse:collapse;font-size:13px;">
+            <thead>
+              <tr style="background:#2c5f8a;color:#fff;">
+                <th style="padding:8px 12px;text-align:left;">Data</th>
+                <th style="padding:8px 12px;text-align:center;">Ogłoszeń</th>
+                <th style="padding:8px 12px;text-align:center;">Nowe</th>
+                <th style="padding:8px 12px;text-align:center;">Usunięte</th>
+                <th style="padding:8px 12px;text-align:center;">Netto</th>
+              </tr>
+            </thead>
+            <tbody>{daily_rows}</tbody>
+          </table>
+        </div>""")
+
+    summary_rows   = "".join(summary_parts)
+    daily_sections = "".join(daily_section_parts)
+
+    return _HTML_SHELL.format(
+        week_start=week_start, today=today,
+        summary_rows=summary_rows, analysis_html=analysis_html,
+        daily_sections=daily_sections, generated=generated,
+    )
+
 
 # ─── ANALIZA AI (Google Gemini) ───────────────────────────────────────────────
 
+AI_CACHE_FILE = "data/ai_analysis_cache.json"
+
+def _load_cached_analysis(prompt_hash: str) -> str | None:
+    """Zwraca zapisaną analizę dla identycznego promptu (np. retry workflow)."""
+    try:
+        with open(AI_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("prompt_hash") == prompt_hash:
+            return cache.get("text") or None
+    except Exception:
+        pass
+    return None
+
+
+def _store_cached_analysis(prompt_hash: str, text: str):
+    try:
+        os.makedirs("data", exist_ok=True)
+        with open(AI_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"prompt_hash": prompt_hash, "text": text,
+                       "cached_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+                      f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"  ⚠  Błąd zapisu cache analizy AI: {e}")
+
+
 def generate_ai_analysis(summary: dict, weekly_data: dict) -> str:
     """Generuje analizę AI na podstawie danych z podsumowania."""
     api_key = os.environ.get("GEMINI_API_KEY", "")
@@ -316,7 +458,7 @@ def generate_ai_analysis(summary: dict, weekly_data: dict) -> str:
 Poniżej masz tygodniowe dane z monitoringu ogłoszeń na OLX.pl (stancje i pokoje w Lublinie).
 
 Dane z ostatnich 7 dni:
-{json.dumps(data_for_ai, ensure_ascii=False, indent=2)}
+{json.dumps(data_for_ai, ensure_ascii=False, separators=(",", ":"))}
 
 Napisz zwięzłą analizę (5-8 zdań) po polsku. Uwzględnij:
 - Ogólny trend na rynku pokoi w Lublinie
@@ -326,6 +468,15 @@ Napisz zwięzłą analizę (5-8 zdań) po polsku. Uwzględnij:
 
 Pisz naturalnie, bez wypunktowań, jako spójny tekst."""
 
+    # Identyczne dane => identyczny prompt — przy retry workflow nie
+    # wydawaj drugi raz tokenów na tę samą analizę
+    import hashlib
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    cached = _load_cached_analysis(prompt_hash)
+    if cached:
+        print("  ✓  Analiza AI z cache (identyczne dane wejściowe)")
+        return cached
+
     # Próbuj modele po kolei — od najtańszego
     models = [
         "gemini-2.0-flash-lite",
@@ -333,10 +484,13 @@ Pisz naturalnie, bez wypunktowań, jako spójny tekst."""
         "gemini-1.5-flash",
     ]
 
+    import requests
+    session = _get_session()
+
     for model in models:
         try:
             url  = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-            resp = requests.post(url, json={
+            resp = session.post(url, json={
                 "contents": [{"parts": [{"text": prompt}]}],
                 "generationConfig": {"maxOutputTokens": 500, "temperature": 0.7},
             }, timeout=30)
@@ -353,6 +507,7 @@ Pisz naturalnie, bez wypunktowań, jako spójny tekst."""
             if "candidates" in data and len(data["candidates"]) > 0:
                 text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
                 print(f"  ✓  Analiza AI wygenerowana przez {model}")
+                _store_cached_analysis(prompt_hash, text)
                 return text
             else:
                 print(f"  ⚠  {model}: brak candidates w odpowiedzi")
@@ -377,6 +532,11 @@ def send_email(subject: str, html_body: str):
         print("⚠  Brak GMAIL_APP_PASSWORD – e-mail nie zostanie wysłany.")
         return False
 
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.mime.application import MIMEApplication
+
     msg            = MIMEMultipart("mixed")
     msg["Subject"] = subject
     msg["From"]    = SENDER_EMAIL
@@ -387,10 +547,13 @@ def send_email(subject: str, html_body: str):
         today           = datetime.now().strftime("%Y-%m-%d")
         attachment_name = f"OLX_Monitor_{today}.xlsx"
         try:
+            # MIMEApplication koduje payload (base64) w jednym kroku;
+            # 8-bitowy transport odpada — Gmail wymaga 7-bit/base64
             with open(EXCEL_FILE, "rb") as f:
-                part = MIMEBase("application", "vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-                part.set_payload(f.read())
-            encoders.encode_base64(part)
+                part = MIMEApplication(
+                    f.read(),
+                    _subtype="vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
             part.add_header("Content-Disposition", "attachment", filename=attachment_name)
             msg.attach(part)
             print(f"  📎 Załączono: {attachment_name}")
@@ -402,7 +565,9 @@ def send_email(subject: str, html_body: str):
     try:
         with smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=15) as server:
             server.login(SENDER_EMAIL, gmail_password)
-            server.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
+            # send_message serializuje przez BytesGenerator — bez
+            # pośredniego str z as_string() i ponownego kodowania
+            server.send_message(msg)
         print(f"✅  E-mail wysłany → {RECIPIENT_EMAIL}")
         return True
     except smtplib.SMTPAuthenticationError as e:
@@ -418,9 +583,45 @@ def send_email(subject: str, html_body: str):
 
 # ─── GŁÓWNA FUNKCJA ──────────────────────────────────────────────────────────
 
+LAST_REPORT_FILE = "data/last_report.json"
+
+def _already_sent(summary_hash: str) -> bool:
+    """True, jeśli raport o identycznych danych wysłano w ciągu 7 dni."""
+    try:
+        with open(LAST_REPORT_FILE, "r", encoding="utf-8") as f:
+            last = json.load(f)
+        if last.get("summary_hash") != summary_hash:
+            return False
+        sent_at = datetime.fromisoformat(last.get("sent_at", ""))
+        return (datetime.now() - sent_at).days < 7
+    except Exception:
+        return False
+
+
+def _mark_sent(summary_hash: str):
+    try:
+        os.makedirs("data", exist_ok=True)
+        with open(LAST_REPORT_FILE, "w", encoding="utf-8") as f:
+            json.dump({"summary_hash": summary_hash,
+                       "sent_at": datetime.now().isoformat(timespec="seconds")},
+                      f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"  ⚠  Błąd zapisu last_report.json: {e}")
+
+
 def send_weekly_report():
     print("\n📧  Generowanie tygodniowego raportu e-mail...")
 
+    # Tani filtr wstępny: plik nie modyfikowany od tygodnia oznacza
+    # brak świeżych danych — bez otwierania workbooka
+    try:
+        import time
+        if time.time() - os.path.getmtime(EXCEL_FILE) > 7 * 86400:
+            print("⚠  Excel nie był aktualizowany od ponad 7 dni – raport pominięty.")
+            return
+    except OSError:
+        pass  # brak pliku zgłosi get_weekly_data
+
     raw_data = get_weekly_data()
     if not raw_data:
         print("⚠  Brak danych z ostatnich 7 dni – raport nie zostanie wysłany.")
@@ -431,13 +632,26 @@ def send_weekly_report():
         print("⚠  Nie udało się wylicz podsumowanie – raport anulowany.")
         return
 
+    # Identyczne dane + raport wysłany w tym tygodniu => nic nowego do
+    # powiedzenia — nie wołaj Gemini i nie wysyłaj duplikatu (np. retry
+    # workflow albo ręczny re-run tego samego dnia)
+    import hashlib
+    summary_hash = hashlib.sha256(
+        json.dumps(summary, ensure_ascii=False, sort_keys=True,
+                   default=str).encode("utf-8")
+    ).hexdigest()
+    if _already_sent(summary_hash):
+        print("⏭  Dane bez zmian od ostatniej wysyłki – pomijam AI i e-mail.")
+        return
+
     analysis = generate_ai_analysis(summary, raw_data)
 
     today   = datetime.now().strftime("%d.%m.%Y")
     subject = f"📊 OLX Monitor – raport tygodniowy {today}"
     html    = build_html_email(summary, summary, analysis)
 
-    send_email(subject, html)
+    if send_email(subject, html):
+        _mark_sent(summary_hash)
 
 
 if __name__ == "__main__":
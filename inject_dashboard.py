@@ -9,27 +9,44 @@ import re
 import os
 import sys
 
-def main():
+# Wszystkie wstrzykiwane globale — jeden wzorzec zamiast czterech
+# osobnych przebiegów re.sub/replace po całym dokumencie.
+# Markery są jednoliniowe (json.dumps bez indent), więc `.*;` bez DOTALL
+# łapie całe przypisanie nawet gdy JSON zawiera średniki w tytułach.
+INJECT_VARS = ("PRICE_HISTORY", "MARKET_TOTAL", "LAST_RUN", "PROFILES_DATA")
+MARKER_RE = re.compile(
+    r"window\.__(" + "|".join(INJECT_VARS) + r")__\s*=\s*.*;"
+)
+
+
+def load_json(path):
+    """Wczytuje plik JSON; zwraca None gdy plik nie istnieje lub jest uszkodzony."""
+    if not os.path.exists(path):
+        return None
     try:
-        # Wczytaj price_history
-        with open("data/price_history.json", "r", encoding="utf-8") as f:
-            history = json.load(f)
-        print(f"✓ Wczytano price_history.json: {len(history)} ogłoszeń")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
     except Exception as e:
-        print(f"❌ Błąd wczytywania price_history.json: {e}")
+        print(f"⚠  Błąd wczytywania {path}: {e}")
+        return None
+
+
+def main():
+    # ──────────────────────────────────────────────────────
+    # Wczytaj wszystkie wejścia raz, przed dotknięciem HTML
+    # ──────────────────────────────────────────────────────
+    history = load_json("data/price_history.json")
+    if history is None:
+        print("❌ Błąd wczytywania price_history.json")
         sys.exit(1)
+    print(f"✓ Wczytano price_history.json: {len(history)} ogłoszeń")
 
-    try:
-        # Wczytaj market_total z last_run.json
-        market_total = None
-        if os.path.exists("data/last_run.json"):
-            with open("data/last_run.json", "r", encoding="utf-8") as f:
-                last_run = json.load(f)
-            market_total = last_run.get("market_total")
-        print(f"✓ Market total: {market_total}")
-    except Exception as e:
-        print(f"⚠  Błąd wczytywania last_run.json: {e}")
-        market_total = None
+    last_run = load_json("data/last_run.json") or {}
+    market_total = last_run.get("market_total")
+    run_at = last_run.get("run_at", "")
+    print(f"✓ Market total: {market_total}")
+
+    profiles_state = load_json("data/profiles_state.json")
 
     try:
         with open("olx_dashboard.html", "r", encoding="utf-8") as f:
@@ -40,104 +57,49 @@ def main():
         sys.exit(1)
 
     # ──────────────────────────────────────────────────────
-    # Wstrzyknij PRICE_HISTORY
-    # ──────────────────────────────────────────────────────
-    inject_ph = f"window.__PRICE_HISTORY__ = {json.dumps(history, ensure_ascii=False)};"
-
-    if "window.__PRICE_HISTORY__" in html:
-        # Istniejący marker — zastąp
-        pattern = r"window\.__PRICE_HISTORY__\s*=\s*(?:\{.*?\}|null);?"
-        html_new = re.sub(pattern, inject_ph, html, count=1, flags=re.DOTALL)
-        if html_new != html:
-            html = html_new
-            print("✓ Price history zaktualizowana (istniejący marker)")
-        else:
-            print("⚠  Nie udało się zaktualizować istniejącego markera — dodaję nowy")
-            # Fallback: dodaj przed </script>
-            if "</script>" in html:
-                html = html.replace("</script>", f"\n{inject_ph}\n</script>", 1)
-                print("✓ Price history dodana (fallback)")
-    else:
-        # Nowy marker — dodaj
-        if "</script>" in html:
-            html = html.replace("</script>", f"\n{inject_ph}\n</script>", 1)
-            print("✓ Price history dodana (nowy marker)")
-
-    # ──────────────────────────────────────────────────────
-    # Wstrzyknij MARKET_TOTAL
+    # Zbuduj wszystkie payloady (nazwa → pełne przypisanie JS)
     # ──────────────────────────────────────────────────────
+    payloads = {
+        "PRICE_HISTORY":
+            f"window.__PRICE_HISTORY__ = {json.dumps(history, ensure_ascii=False)};",
+    }
     if market_total is not None:
-        inject_mt = f"window.__MARKET_TOTAL__ = {market_total};"
-        
-        if "window.__MARKET_TOTAL__" in html:
-            html = re.sub(
-                r"window\.__MARKET_TOTAL__\s*=\s*\d+;?",
-                inject_mt,
-                html,
-                count=1
-            )
-            print("✓ Market total zaktualizowany")
-        else:
-            if "</script>" in html:
-                html = html.replace("</script>", f"\n{inject_mt}\n</script>", 1)
-                print("✓ Market total dodany")
+        payloads["MARKET_TOTAL"] = f"window.__MARKET_TOTAL__ = {market_total};"
+    if run_at:
+        payloads["LAST_RUN"] = f'window.__LAST_RUN__ = "{run_at}";'
+    if profiles_state is not None:
+        payloads["PROFILES_DATA"] = (
+            f"window.__PROFILES_DATA__ = {json.dumps(profiles_state, ensure_ascii=False)};"
+        )
 
     # ──────────────────────────────────────────────────────
-    # Wstrzyknij LAST_RUN (czas ostatniego skanu)
+    # Jeden przebieg po HTML: zastąp istniejące markery callbackiem
     # ──────────────────────────────────────────────────────
-    try:
-        if os.path.exists("data/last_run.json"):
-            with open("data/last_run.json", "r", encoding="utf-8") as f_lr:
-                last_run_data = json.load(f_lr)
-            run_at = last_run_data.get("run_at", "")
-            if run_at:
-                inject_lr = f'window.__LAST_RUN__ = "{run_at}";'
-                if "window.__LAST_RUN__" in html:
-                    html = re.sub(
-                        r'window\.__LAST_RUN__\s*=\s*"[^"]*";?',
-                        inject_lr,
-                        html,
-                        count=1
-                    )
-                    print("✓ Last run zaktualizowany")
-                else:
-                    if "</script>" in html:
-                        html = html.replace("</script>", f"\n{inject_lr}\n</script>", 1)
-                        print("✓ Last run dodany")
-    except Exception as e:
-        print(f"⚠  Błąd wstrzykiwania LAST_RUN: {e}")
+    replaced = set()
 
-    # ──────────────────────────────────────────────────────
-    # Wstrzyknij PROFILES_DATA (obsługa wieloliniowego JSON)
-    # ──────────────────────────────────────────────────────
-    try:
-        if os.path.exists("data/profiles_state.json"):
-            with open("data/profiles_state.json", "r", encoding="utf-8") as f_ps:
-                profiles_state = json.load(f_ps)
-            inject_pd = f"window.__PROFILES_DATA__ = {json.dumps(profiles_state, ensure_ascii=False)};"
-            
-            if "window.__PROFILES_DATA__" in html:
-                # Najlepiej: znajdź dokładne granice zmiennej
-                start = html.find("window.__PROFILES_DATA__ = ")
-                if start != -1:
-                    # Szukaj końca (";")
-                    search_from = start + len("window.__PROFILES_DATA__ = ")
-                    end = html.find(";", search_from)
-                    if end != -1:
-                        # Zamień zawartość między "= " a ";"
-                        html = html[:start] + f"window.__PROFILES_DATA__ = {json.dumps(profiles_state, ensure_ascii=False)};" + html[end+1:]
-                        print("✓ Profiles data zaktualizowana (precyzyjnie)")
-                    else:
-                        print("⚠  Nie znaleziono końca PROFILES_DATA")
-                else:
-                    print("⚠  Nie znaleziono początku PROFILES_DATA")
-            else:
-                # Nowy marker
-                if "</script>" in html:
-                    html = html.replace("</script>", f"\n{inject_pd}\n</script>", 1)
-                    print("✓ Profiles data dodana (nowy marker)")
-    except Exception as e:
-        print(f"⚠  Błąd wstrzykiwania PROFILES_DATA: {e}")
+    def _replace(m):
+        name = m.group(1)
+        if name in payloads:
+            replaced.add(name)
+            return payloads[name]
+        return m.group(0)   # brak danych — zostaw stary marker
+
+    html = MARKER_RE.sub(_replace, html)
+    for name in replaced:
+        print(f"✓ {name} zaktualizowany (istniejący marker)")
+
+    # Markery, których jeszcze nie ma w dokumencie — dopisz przed </script>
+    missing = [payloads[n] for n in INJECT_VARS
+               if n in payloads and n not in replaced]
+    if missing:
+        block = "\n" + "\n".join(missing) + "\n"
+        if "</script>" in html:
+            html = html.replace("</script>", f"{block}</script>", 1)
+            for n in INJECT_VARS:
+                if n in payloads and n not in replaced:
+                    print(f"✓ {n} dodany (nowy marker)")
+        else:
+            print("⚠  Brak </script> w dashboardzie — nie dodano nowych markerów")
 
     # ──────────────────────────────────────────────────────
     # Zapisz zaktualizowany HTML
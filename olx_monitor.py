@@ -17,7 +17,7 @@ Kolumny Excela:
 """
 
 import requests, re, json, os, time
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime
 from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
@@ -27,6 +27,7 @@ from openpyxl.utils import get_column_letter
 CONFIG_FILE        = "config.json"
 EXCEL_FILE         = "data/olx_monitoring.xlsx"
 PRICE_HISTORY_FILE = "data/price_history.json"
+CREATED_CACHE_FILE = "data/created_cache.json"
 
 HEADERS = {
     "User-Agent":      "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -36,22 +37,59 @@ HEADERS = {
     "Accept":          "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
+# Jedna sesja HTTP dla wszystkich zapytań do OLX — keep-alive i pula
+# połączeń zamiast nowego handshake'u TCP+TLS na każde ogłoszenie
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=8, pool_maxsize=8,
+    max_retries=requests.adapters.Retry(
+        total=3, backoff_factor=0.5,
+        # 429 = rate limit OLX — urllib3 odczeka czas z nagłówka
+        # Retry-After zamiast zgłaszać profil jako błąd
+        status_forcelist=[429, 502, 503, 504],
+        respect_retry_after_header=True,
+    ),
+))
+
+# Parsuj tylko poddrzewo kart ogłoszeń <div type="list"> — reszta strony
+# (head, skrypty, stopka) nie jest potrzebna do ekstrakcji
+CARD_STRAINER = SoupStrainer("div", attrs={"type": "list"})
+
 # Zakresy cen dla walidacji (pokoje w Lublinie)
 MIN_PRICE = 150   # zł/mies
 MAX_PRICE = 20000  # zł/mies
 
+# Polskie skróty miesięcy — wspólne dla etykiet price_history
+# i profiles_state
+MONTHS_PL = ("sty","lut","mar","kwi","maj","cze",
+             "lip","sie","wrz","paź","lis","gru")
+
+# Wzorce używane w pętlach per-karta / per-ogłoszenie — kompilowane
+# raz przy imporcie zamiast przy każdym wywołaniu
+RE_ISO_DT   = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2})")
+RE_PRICE    = re.compile(r"(\d[\d\s]*\d|\d)\s*zł", re.IGNORECASE)
+RE_NONDIGIT = re.compile(r"[^\d]")
+RE_AD_ID    = re.compile(r"/d/oferta/([^/?\.]+)")
+RE_FOUND    = re.compile(r"Znaleźliśmy\D{0,40}?(\d+)")
+
 # ── POMOCNICZE ────────────────────────────────────────────
 def parse_created(html):
     """
     Wyciąga datę publikacji ogłoszenia z zakodowanego JSON w HTML.
     OLX osadza: createdTime\\\":\\\"2025-09-18T18:08:49+02:00\\\"
+    Przyjmuje bytes (r.content — bez dekodowania całej strony) lub str.
     Zwraca (datetime_iso_str, days_old) lub (None, None).
     """
-    idx = html.find("createdTime")
+    marker = b"createdTime" if isinstance(html, bytes) else "createdTime"
+    idx = html.find(marker)
     if idx < 0:
         return None, None
     snippet = html[idx:idx + 80]
-    m = re.search(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2})", snippet)
+    if isinstance(snippet, bytes):
+        # Dekoduj tylko 80-bajtowy wycinek, nie całe ~500 KB strony
+        snippet = snippet.decode("utf-8", "ignore")
+    m = RE_ISO_DT.search(snippet)
     if not m:
         return None, None
     dt_str = m.group(1)
@@ -64,12 +102,32 @@ def parse_created(html):
         return None, None
 
 
+def write_json(path, data):
+    """
+    Zapisuje JSON atomowo: najpierw do pliku tymczasowego, potem
+    os.replace — awaria w trakcie zapisu nie zostawia uciętego pliku.
+    Gdy serializacja daje identyczną zawartość jak na dysku, zapis jest
+    pomijany (niezmieniony plik = brak commita w workflow).
+    Zwraca True, jeśli plik został zapisany.
+    """
+    buf = json.dumps(data, ensure_ascii=False, indent=2)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == buf:
+                return False
+    except OSError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(buf)
+    os.replace(tmp, path)
+    return True
+
+
 def today_label():
     """Krótka etykieta dnia dla price_history — np. '16 lut'."""
-    months = ["sty","lut","mar","kwi","maj","cze",
-               "lip","sie","wrz","paź","lis","gru"]
     n = datetime.now()
-    return f"{n.day} {months[n.month - 1]}"
+    return f"{n.day} {MONTHS_PL[n.month - 1]}"
 
 
 def extract_price_from_card(card_text: str) -> int:
@@ -92,14 +150,14 @@ def extract_price_from_card(card_text: str) -> int:
       "1200 zł + 400 zł media = 1600 zł" → 1200 (najniższa prawidłowa)
     """
     # Znajdź WSZYSTKIE wystąpienia ceny
-    matches = re.findall(r"(\d[\d\s]*\d|\d)\s*zł", card_text, re.IGNORECASE)
+    matches = RE_PRICE.findall(card_text)
     if not matches:
         return 0
     
     # Przekonwertuj wszystkie znalezione ceny na liczby
     prices = []
     for match in matches:
-        price_str = re.sub(r"[^\d]", "", match)
+        price_str = RE_NONDIGIT.sub("", match)
         if not price_str or price_str == "0":
             continue
         try:
@@ -119,15 +177,20 @@ def extract_price_from_card(card_text: str) -> int:
 
 
 # ── CROSS-CHECK: weryfikacja liczby ogłoszeń ─────────────
-def crosscheck_count(soup) -> int | None:
+def crosscheck_count(html: str) -> int | None:
     """
     Wyciąga oficjalną liczbę ogłoszeń z tekstu 'Znaleźliśmy X ogłoszeń'
-    na stronie profilu OLX. Zwraca int lub None jeśli nie znaleziono.
+    na stronie profilu OLX. Działa na surowym HTML, żeby scrape_profile
+    mógł parsować tylko poddrzewo kart. Zwraca int lub None.
     """
-    for el in soup.find_all(string=re.compile(r"Znaleźliśmy")):
-        m = re.search(r"(\d+)", el)
-        if m:
-            return int(m.group(1))
+    # str.find lokalizuje znacznik (memchr w C), regex przeszukuje
+    # tylko 200-znakowe okno za nim zamiast całej strony
+    idx = html.find("Znaleźliśmy")
+    if idx < 0:
+        return None
+    m = RE_FOUND.search(html, idx, idx + 200)
+    if m:
+        return int(m.group(1))
     return None
 
 
@@ -138,8 +201,8 @@ def fetch_market_total() -> int | None:
     """
     url = "https://www.olx.pl/nieruchomosci/stancje-pokoje/lublin/"
     try:
-        r    = requests.get(url, headers=HEADERS, timeout=15)
-        soup = BeautifulSoup(r.text, "html.parser")
+        r    = SESSION.get(url, timeout=15)
+        soup = BeautifulSoup(r.text, "lxml")
         el   = soup.find(attrs={"data-testid": "total-count"})
         if el:
             m = re.search(r"(\d+)", el.get_text())
@@ -147,13 +210,12 @@ def fetch_market_total() -> int | None:
                 total = int(m.group(1))
                 print(f"  → Rynek OLX Lublin (stancje/pokoje): {total} ogłoszeń")
                 return total
-        # fallback: szukaj w tekście strony
-        for text_el in soup.find_all(string=re.compile(r"Znaleźliśmy")):
-            m = re.search(r"(\d+)", text_el)
-            if m:
-                total = int(m.group(1))
-                print(f"  → Rynek OLX Lublin (fallback): {total} ogłoszeń")
-                return total
+        # fallback: jeden regex po surowym HTML zamiast przejścia
+        # po wszystkich węzłach tekstowych drzewa
+        total = crosscheck_count(r.text)
+        if total is not None:
+            print(f"  → Rynek OLX Lublin (fallback): {total} ogłoszeń")
+            return total
     except Exception as e:
         print(f"  ⚠ Błąd pobierania licznika rynku: {e}")
     return None
@@ -163,13 +225,15 @@ def fetch_market_total() -> int | None:
 def scrape_profile(profile_name, profile_url):
     print(f"  [{profile_name}] {profile_url}")
     try:
-        r = requests.get(profile_url, headers=HEADERS, timeout=15)
+        r = SESSION.get(profile_url, timeout=15)
         r.raise_for_status()
     except Exception as e:
         print(f"    ⚠ Błąd pobierania profilu: {e}")
         return [], None, None
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    # Parsuj tylko karty ogłoszeń — SoupStrainer pomija budowę drzewa
+    # dla całej reszty dokumentu
+    soup = BeautifulSoup(r.text, "lxml", parse_only=CARD_STRAINER)
     listings, seen = [], set()
 
     # Metoda 1: div[type="list"] — stabilny atrybut, niezależny od klas CSS
@@ -180,7 +244,7 @@ def scrape_profile(profile_name, profile_url):
         a = card.find("a", href=lambda h: h and "/d/oferta/" in h)
         if not a:
             continue
-        href = re.sub(r"\?.*", "", a.get("href", ""))
+        href = a.get("href", "").split("?", 1)[0]
         if href in seen:
             continue
         seen.add(href)
@@ -195,7 +259,7 @@ def scrape_profile(profile_name, profile_url):
         price = extract_price_from_card(card_text)
 
         full_url   = ("https://www.olx.pl" + href) if href.startswith("/") else href
-        id_m       = re.search(r"/d/oferta/([^/?\.]+)", href)
+        id_m       = RE_AD_ID.search(href)
         listing_id = id_m.group(1) if id_m else href.replace("/", "_")
 
         listings.append({
@@ -208,11 +272,13 @@ def scrape_profile(profile_name, profile_url):
             "days_old": None,
         })
 
-    # Metoda 2 (fallback): jeśli type=list nie zadziałał
+    # Metoda 2 (fallback): jeśli type=list nie zadziałał — tu potrzebny
+    # jest pełny parse, bo linki mogą leżeć poza kartami
     if not listings:
         print(f"    ⚠ Metoda type=list nie znalazła kart — fallback na href")
+        soup = BeautifulSoup(r.text, "lxml")
         for a in soup.find_all("a", href=lambda h: h and "/d/oferta/" in h):
-            href = re.sub(r"\?.*", "", a.get("href", ""))
+            href = a.get("href", "").split("?", 1)[0]
             if href in seen:
                 continue
             seen.add(href)
@@ -226,7 +292,7 @@ def scrape_profile(profile_name, profile_url):
             card_text = ancestor.get_text(" ", strip=True)
             price = extract_price_from_card(card_text)
             full_url = ("https://www.olx.pl" + href) if href.startswith("/") else href
-            id_m = re.search(r"/d/oferta/([^/?\.]+)", href)
+            id_m = RE_AD_ID.search(href)
             listing_id = id_m.group(1) if id_m else href.replace("/", "_")
             listings.append({
                 "id": listing_id, "profile": profile_name, "title": title,
@@ -234,7 +300,7 @@ def scrape_profile(profile_name, profile_url):
             })
 
     # ── Cross-check z oficjalną liczbą OLX ───────────────
-    official_count = crosscheck_count(soup)
+    official_count = crosscheck_count(r.text)
     scraped_count  = len(listings)
 
     if official_count is None:
@@ -253,51 +319,152 @@ def scrape_profile(profile_name, profile_url):
 
 
 # ── SCRAPER: data publikacji z każdego ogłoszenia ─────────
-def fetch_dates(listings, delay=1.2):
+def fetch_dates(listings, delay=1.2, workers=4):
     """
     Wchodzi w stronę każdego ogłoszenia i wyciąga createdTime.
-    Delay chroni przed blokadą IP.
-    
+    Pobiera równolegle w małej puli wątków (czas to głównie czekanie
+    na sieć); delay per wątek ogranicza łączne tempo do ~workers/delay
+    zapytań na sekundę, a 429 obsługuje Retry-After w SESSION.
+
     NAPRAWY:
       - Obsługa wyjątków dla każdego ogłoszenia niezależnie
       - Timeout dla każdego requesta
       - Logowanie błędów bez przerywania procesu
     """
-    print(f"\n  Pobieranie dat publikacji ({len(listings)} ogłoszeń, ~{len(listings)*delay:.0f}s)...")
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Data publikacji ogłoszenia nigdy się nie zmienia — znane ID
+    # bierzemy z cache zamiast pobierać stronę jeszcze raz
+    cache = {}
+    if os.path.exists(CREATED_CACHE_FILE):
+        try:
+            with open(CREATED_CACHE_FILE, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except Exception as e:
+            print(f"  ⚠ Błąd wczytywania created_cache.json: {e}")
+
+    # Ten sam anons potrafi wisieć w kilku profilach — pobierz każdy
+    # unikalny ID raz i przepisz wynik na pozostałe kopie
+    unique = {}
+    for l in listings:
+        unique.setdefault(l["id"], l)
+
+    now = datetime.now()
+    to_fetch = []
+    for l in unique.values():
+        created = cache.get(l["id"])
+        if created:
+            try:
+                dt = datetime.strptime(created, "%d.%m.%Y")
+                l["created"]  = created
+                l["days_old"] = max(0, (now - dt).days)
+            except ValueError:
+                to_fetch.append(l)   # uszkodzony wpis — pobierz od nowa
+        else:
+            to_fetch.append(l)
+
+    n = len(to_fetch)
+    eta = n * delay / max(1, min(workers, n))
+    print(f"\n  Pobieranie dat publikacji ({n} z {len(unique)} ogłoszeń, "
+          f"{len(unique) - n} z cache, ~{eta:.0f}s)...")
     failed = []
-    
-    for i, l in enumerate(listings, 1):
+
+    # Adaptacyjne tempo zamiast sztywnego delay: po 10 udanych zapytaniach
+    # z rzędu przerwa maleje o 10% (do 0.3 s), po throttlingu OLX
+    # (429/503 mimo retry) podwaja się (max 4× delay startowego)
+    pace = {"delay": delay, "streak": 0}
+
+    def _tune(ok, throttled=False):
+        if ok:
+            pace["streak"] += 1
+            if pace["streak"] >= 10:
+                pace["streak"] = 0
+                pace["delay"] = max(0.3, pace["delay"] * 0.9)
+        else:
+            pace["streak"] = 0
+            if throttled:
+                pace["delay"] = min(delay * 4, pace["delay"] * 2)
+
+    def _read_created(r):
+        """
+        Czyta odpowiedź kawałkami i przerywa pobieranie, gdy tylko
+        createdTime pojawi się w buforze — znacznik siedzi zwykle w
+        pierwszych kilkudziesięciu KB, a strony mają po kilkaset.
+        """
+        buf = b""
+        for chunk in r.iter_content(chunk_size=16384):
+            buf += chunk
+            idx = buf.find(b"createdTime")
+            if idx >= 0:
+                if len(buf) >= idx + 80:
+                    return parse_created(buf[idx:idx + 80])
+                continue   # znacznik tuż przy granicy chunka — doczytaj
+            # trzymaj tylko ogon bufora; znacznik może być przecięty granicą
+            if len(buf) > 65536:
+                buf = buf[-64:]
+        return parse_created(buf)
+
+    def _fetch_one(l):
         try:
-            r = requests.get(l["url"], headers=HEADERS, timeout=12)
-            r.raise_for_status()
-            created, days = parse_created(r.text)
+            with SESSION.get(l["url"], timeout=12, stream=True) as r:
+                r.raise_for_status()
+                created, days = _read_created(r)
             l["created"]  = created  # "DD.MM.YYYY" lub None
             l["days_old"] = days     # int lub None
             status = f"{created}  ({days} dni)" if created else "brak daty"
+            _tune(ok=True)
         except requests.exceptions.Timeout:
             l["created"]  = None
             l["days_old"] = None
             status = "błąd: timeout"
             failed.append(l["id"])
-        except requests.exceptions.ConnectionError as e:
+            _tune(ok=False)
+        except requests.exceptions.ConnectionError:
             l["created"]  = None
             l["days_old"] = None
-            status = f"błąd: brak sieci"
+            status = "błąd: brak sieci"
             failed.append(l["id"])
+            _tune(ok=False)
         except Exception as e:
             l["created"]  = None
             l["days_old"] = None
             status = f"błąd: {type(e).__name__}"
             failed.append(l["id"])
-        
-        print(f"    [{i:2}/{len(listings)}] {l['title'][:50]:<50} {status}")
-        time.sleep(delay)
-    
+            resp = getattr(e, "response", None)
+            _tune(ok=False, throttled=(
+                resp is not None and resp.status_code in (429, 503)
+                or isinstance(e, requests.exceptions.RetryError)))
+
+        time.sleep(pace["delay"])   # throttle per wątek
+        return status
+
+    with ThreadPoolExecutor(max_workers=min(workers, max(1, n))) as ex:
+        for i, (l, status) in enumerate(zip(to_fetch, ex.map(_fetch_one, to_fetch)), 1):
+            print(f"    [{i:2}/{n}] {l['title'][:50]:<50} {status}")
+
     if failed:
         print(f"\n  ⚠  Niepowodzenia ({len(failed)}): {', '.join(failed[:5])}")
         if len(failed) > 5:
             print(f"      ... i {len(failed)-5} więcej")
-    
+
+    # Dopisz świeżo znalezione daty do cache
+    new_entries = {l["id"]: l["created"] for l in to_fetch if l["created"]}
+    if new_entries:
+        cache.update(new_entries)
+        os.makedirs(os.path.dirname(CREATED_CACHE_FILE), exist_ok=True)
+        try:
+            write_json(CREATED_CACHE_FILE, cache)
+        except Exception as e:
+            print(f"  ⚠ Błąd zapisu created_cache.json: {e}")
+
+    # Przepisz daty na duplikaty z innych profili
+    if len(unique) < len(listings):
+        for l in listings:
+            src = unique[l["id"]]
+            if src is not l:
+                l["created"]  = src["created"]
+                l["days_old"] = src["days_old"]
+
     return listings
 
 
@@ -313,29 +480,41 @@ def update_price_history(listings):
         except Exception as e:
             print(f"  ⚠ Błąd wczytywania price_history.json: {e}")
 
+    changed = False
     for l in listings:
         lid = l["id"]
         if lid not in history:
             history[lid] = {"title": l["title"], "profile": l["profile"],
                             "created": l["created"] or "", "prices": []}
+            changed = True
         else:
             if not history[lid].get("created") and l.get("created"):
                 history[lid]["created"] = l["created"]
+                changed = True
 
+        # Wpisy cen są dopisywane chronologicznie, więc dzisiejszy może
+        # być tylko ostatni — bez liniowego skanu całej historii
         prices = history[lid]["prices"]
-        entry  = next((e for e in prices if e["date"] == today), None)
-        if entry:
-            entry["price"] = l["price"]
+        if prices and prices[-1]["date"] == today:
+            if prices[-1]["price"] != l["price"]:
+                prices[-1]["price"] = l["price"]
+                changed = True
         elif l["price"] > 0:
             prices.append({"date": today, "price": l["price"]})
+            changed = True
+
+    if not changed:
+        print(f"  → {PRICE_HISTORY_FILE}: bez zmian ({len(history)} ogłoszeń)")
+        return history
 
     try:
-        with open(PRICE_HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
+        write_json(PRICE_HISTORY_FILE, history)
         print(f"  → {PRICE_HISTORY_FILE}: {len(history)} ogłoszeń")
     except Exception as e:
         print(f"  ⚠ Błąd zapisywania price_history.json: {e}")
 
+    return history
+
 
 # ── EXCEL ─────────────────────────────────────────────────
 COLUMNS = [
@@ -349,6 +528,15 @@ COLUMNS = [
     ("ID ogłoszenia",     44),
 ]
 
+# Współdzielone obiekty stylów — openpyxl indeksuje style po tożsamości,
+# więc jeden obiekt na typ zamiast świeżej alokacji przy każdej komórce
+ALIGN_LEFT   = Alignment(horizontal="left")
+ALIGN_CENTER = Alignment(horizontal="center")
+FONT_FRESH   = Font(color="47ffa0", bold=True, size=10)   # świeże — zielony
+FONT_RECENT  = Font(color="e8ff47", bold=False, size=10)  # niedawne — żółty
+FONT_OLD     = Font(color="ff6b6b", bold=False, size=10)  # stare — czerwony
+
+
 def cell_style(cell, color=None, bold=False, align="left"):
     if color:
         cell.font = Font(color=color, bold=bold, size=10)
@@ -400,24 +588,25 @@ def save_to_excel(listings):
                 l["url"],
                 l["id"],
             ])
-            row = ws.max_row
+            # Jedno pobranie krotki komórek wiersza zamiast pięciu
+            # wywołań ws.cell(row, col)
+            row_cells = ws[ws.max_row]
 
             # Wyrównanie
-            ws.cell(row, 1).alignment = Alignment(horizontal="left")
-            ws.cell(row, 3).alignment = Alignment(horizontal="left")
-            ws.cell(row, 4).alignment = Alignment(horizontal="center")
-            ws.cell(row, 5).alignment = Alignment(horizontal="center")
-            ws.cell(row, 6).alignment = Alignment(horizontal="center")
+            row_cells[0].alignment = ALIGN_LEFT
+            row_cells[2].alignment = ALIGN_LEFT
+            row_cells[3].alignment = ALIGN_CENTER
+            row_cells[4].alignment = ALIGN_CENTER
+            row_cells[5].alignment = ALIGN_CENTER
 
             # Kolorowanie kolumny "Dni od publikacji"
             if days is not None:
-                cell = ws.cell(row, 6)
                 if days <= 3:
-                    cell.font = Font(color="47ffa0", bold=True, size=10)   # świeże — zielony
+                    row_cells[5].font = FONT_FRESH
                 elif days <= 14:
-                    cell.font = Font(color="e8ff47", bold=False, size=10)  # niedawne — żółty
+                    row_cells[5].font = FONT_RECENT
                 elif days > 60:
-                    cell.font = Font(color="ff6b6b", bold=False, size=10)  # stare — czerwony
+                    row_cells[5].font = FONT_OLD
 
         wb.save(EXCEL_FILE)
         print(f"  → {EXCEL_FILE}: +{len(listings)} wierszy (łącznie {ws.max_row - 1})")
@@ -453,9 +642,7 @@ def save_profiles_state(all_listings, config, price_history):
         by_profile[l["profile"]].append(l)
 
     # Etykieta daty w formacie "17 lut 2026"
-    month_pl = ["sty","lut","mar","kwi","maj","cze",
-                "lip","sie","wrz","paź","lis","gru"]
-    today_str = f"{today.day} {month_pl[today.month-1]} {today.year}"
+    today_str = f"{today.day} {MONTHS_PL[today.month-1]} {today.year}"
 
     profiles_out = {}
     for p in config.get("profiles", []):
@@ -465,10 +652,17 @@ def save_profiles_state(all_listings, config, price_history):
         listings  = by_profile.get(name, [])
         prev_prof = prev_data.get(name, {})
         prev_curr = prev_prof.get("current", [])
-        prev_ids  = {l["id"] for l in prev_curr}
-        curr_ids  = {l["id"] for l in listings}
-        new_ids   = curr_ids - prev_ids
-        gone_ids  = prev_ids - curr_ids
+        prev_ids  = frozenset(l["id"] for l in prev_curr)
+        curr_ids  = frozenset(l["id"] for l in listings)
+
+        # Różnica symetryczna raz — w typowy dzień bez zmian oba zbiory
+        # różnic są puste i nie ma czego dalej liczyć
+        sym = curr_ids ^ prev_ids
+        if sym:
+            new_ids  = curr_ids & sym
+            gone_ids = prev_ids & sym
+        else:
+            new_ids = gone_ids = frozenset()
 
         # current[] — ogłoszenia z bieżącego skanu
         current = []
@@ -490,7 +684,7 @@ def save_profiles_state(all_listings, config, price_history):
             {"id": pl["id"], "title": pl["title"],
              "price": pl["price"], "url": pl["url"], "date": today_pl}
             for pl in prev_curr if pl["id"] in gone_ids
-        ]
+        ] if gone_ids else []
 
         # Historia — jeden wpis na dzień, zastąp dzisiejszy jeśli istnieje
         history = [h for h in prev_prof.get("history", [])
@@ -512,8 +706,7 @@ def save_profiles_state(all_listings, config, price_history):
 
     os.makedirs("data", exist_ok=True)
     try:
-        with open(state_file, "w", encoding="utf-8") as f:
-            json.dump(profiles_out, f, ensure_ascii=False, indent=2)
+        write_json(state_file, profiles_out)
         total = sum(len(v["current"]) for v in profiles_out.values())
         print(f"  → {state_file}: {total} ogłoszeń w {len(profiles_out)} profilach")
     except Exception as e:
@@ -533,12 +726,18 @@ def main():
         print(f"❌ Błąd wczytywania config.json: {e}")
         return
 
-    # 1. Scrape profiles
-    print("\n[1/3] Scraping profili OLX...")
+    # 1. Scrape profiles — równolegle, strony profili są niezależne
+    # a czas to głównie czekanie na sieć
+    print("\n[1/3] Scraping profili OLX (równolegle)...")
+    from concurrent.futures import ThreadPoolExecutor
+
+    profiles = config.get("profiles", [])
     all_listings  = []
     crosscheck_results = []   # (profile, scraped, official, ok)
-    for p in config.get("profiles", []):
-        listings, official, cc_ok = scrape_profile(p["name"], p["url"])
+    with ThreadPoolExecutor(max_workers=min(4, max(1, len(profiles)))) as ex:
+        results = list(ex.map(
+            lambda p: scrape_profile(p["name"], p["url"]), profiles))
+    for p, (listings, official, cc_ok) in zip(profiles, results):
         all_listings.extend(listings)
         crosscheck_results.append((p["name"], len(listings), official, cc_ok))
 
@@ -557,18 +756,10 @@ def main():
 
     # 3. Zapis
     print("\n[3/3] Zapisywanie...")
-    update_price_history(all_listings)
+    # update_price_history zwraca słownik, który przed chwilą zapisał —
+    # bez ponownego czytania i parsowania pliku z dysku
+    ph = update_price_history(all_listings)
     save_to_excel(all_listings)
-
-    # Wczytaj price_history do stanu profili
-    ph = {}
-    if os.path.exists(PRICE_HISTORY_FILE):
-        try:
-            with open(PRICE_HISTORY_FILE, "r", encoding="utf-8") as f:
-                ph = json.load(f)
-        except Exception as e:
-            print(f"  ⚠ Błąd wczytywania price_history dla profiles_state: {e}")
-    
     save_profiles_state(all_listings, config, ph)
 
     # Podsumowanie
@@ -601,7 +792,6 @@ def main():
         print("\n✓ Wszystkie profile zgodne z licznikiem OLX.")
 
     # Zapisz wyniki cross-check do last_run.json
-    import json as _json
     last_run = {
         "run_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "total_listings": len(all_listings),
@@ -615,8 +805,7 @@ def main():
     }
     os.makedirs("data", exist_ok=True)
     try:
-        with open("data/last_run.json", "w", encoding="utf-8") as f:
-            _json.dump(last_run, f, ensure_ascii=False, indent=2)
+        write_json("data/last_run.json", last_run)
         print(f"\n  → data/last_run.json zaktualizowany")
     except Exception as e:
         print(f"\n  ⚠ Błąd zapisu last_run.json: {e}")